@@ -12,13 +12,20 @@ from __future__ import annotations
 import asyncio
 import contextvars
 import json
+import sys
 import time
+from collections import deque
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any
 
 from opentelemetry import trace
 
+try:
+    import orjson
+except ImportError:  # orjson is optional (msgtrace-sdk[fast])
+    orjson = None
+
 # =============================================================================
 # Event Types (OpenTelemetry GenAI Semantic Conventions)
 # =============================================================================
@@ -66,7 +73,7 @@ class EventType:
 # =============================================================================
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StreamEvent:
     """
     An event captured during span execution for real-time streaming.
@@ -88,14 +95,66 @@ class StreamEvent:
     trace_id: str = ""
 
 
+# =============================================================================
+# Attribute Serialization
+# =============================================================================
+
+# Attribute value types that OTel cannot store natively and must be JSON-encoded
+_JSON_TYPES = (dict, list)
+
+
+def _json_dumps(value: Any) -> str:
+    """Encode with the stdlib, formatted like orjson (compact, raw UTF-8)."""
+    return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+if orjson is not None:
+    # Non-str keys are stringified like json does; datetimes and dataclasses
+    # go through default=str so both backends produce the same strings
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def _serialize_value(value: Any) -> str:
+        """Serialize a dict/list attribute value to a JSON string (orjson)."""
+        try:
+            return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which orjson rejects without
+            # calling default; the stdlib encoder handles them
+            return _json_dumps(value)
+
+else:
+    _serialize_value = _json_dumps
+
+
+def _serialize_attributes(attrs: dict[str, Any]) -> dict[str, Any]:
+    """Return a copy of attrs with dict/list values JSON-encoded for OTel."""
+    serialize = _serialize_value
+    json_types = _JSON_TYPES
+    return {
+        key: serialize(value) if isinstance(value, json_types) else value
+        for key, value in attrs.items()
+    }
+
+
 # =============================================================================
 # Streaming Queue (Context Variable)
 # =============================================================================
 
-_event_queue: contextvars.ContextVar[asyncio.Queue | None] = contextvars.ContextVar(
+# A ContextVar (rather than state on the running asyncio.Task) is what lets
+# tasks spawned inside an EventStream inherit it, and its get() is a
+# constant-time lookup that also works outside an event loop.
+
+_event_queue: contextvars.ContextVar[EventStream | None] = contextvars.ContextVar(
     "_event_queue", default=None
 )
 
+# Hot-path bindings used by add_event (skip module attribute lookups per event)
+_get_queue = _event_queue.get
+_get_current_span = trace.get_current_span
+_time_ns = time.time_ns
+
 
 # =============================================================================
 # Event Emission Functions
@@ -126,32 +185,53 @@ def add_event(
             "arguments": {"query": "weather"},
         })
     """
-    span = trace.get_current_span()
-    attrs = attributes or {}
+    queue = _get_queue()
+    span = _get_current_span()
+    recording = span.is_recording()
 
-    # Serialize complex types for OTel compatibility
-    serialized_attrs = {}
-    for key, value in attrs.items():
-        if isinstance(value, (dict, list)):
-            serialized_attrs[key] = json.dumps(value)
-        else:
-            serialized_attrs[key] = value
+    # Fast path: nothing to persist and nobody streaming
+    if not recording and queue is None:
+        return
 
-    # 1. Always emit to OTel span (for persistence)
-    if span.is_recording():
+    attrs = attributes or {}
+
+    # 1. Emit to OTel span (for persistence)
+    if recording:
+        # Serialize complex types for OTel compatibility; only copy the
+        # attributes when at least one value actually needs encoding
+        serialized_attrs = attrs
+        for value in attrs.values():
+            if isinstance(value, _JSON_TYPES):
+                serialized_attrs = _serialize_attributes(attrs)
+                break
         span.add_event(name, serialized_attrs)
 
     # 2. Also emit to streaming queue (if active)
-    queue = _event_queue.get()
     if queue is not None:
-        span_context = span.get_span_context() if span.is_recording() else None
+        if recording:
+            # Consecutive events usually come from the same span (e.g. chunk
+            # streams), so reuse its hex IDs instead of re-formatting them
+            span_context = span.get_span_context()
+            span_ids = queue._span_ids
+            if span_ids[0] is not span_context:
+                span_ids = queue._span_ids = (
+                    span_context,
+                    f"{span_context.span_id:016x}",
+                    f"{span_context.trace_id:032x}",
+                )
+            span_name = span.name
+            span_id = span_ids[1]
+            trace_id = span_ids[2]
+        else:
+            span_name = span_id = trace_id = ""
+        # Positional construction: cheaper than keywords in the dataclass __init__
         event = StreamEvent(
-            name=name,
-            attributes=attrs,  # Keep original (non-serialized) for streaming
-            timestamp_ns=time.time_ns(),
-            span_name=span.name if span.is_recording() else "",
-            span_id=(format(span_context.span_id, "016x") if span_context else ""),
-            trace_id=(format(span_context.trace_id, "032x") if span_context else ""),
+            name,
+            attrs,  # Keep original (non-serialized) for streaming
+            _time_ns(),
+            span_name,
+            span_id,
+            trace_id,
         )
         queue.put_nowait(event)
 
@@ -160,10 +240,26 @@ def add_event(
 # Convenience Event Functions
 # =============================================================================
 
+# Interned event names used by the convenience functions below; module globals
+# avoid the EventType attribute lookup on every call.
+_AGENT_START = sys.intern(EventType.AGENT_START)
+_AGENT_COMPLETE = sys.intern(EventType.AGENT_COMPLETE)
+_AGENT_STEP = sys.intern(EventType.AGENT_STEP)
+_MODEL_REQUEST = sys.intern(EventType.MODEL_REQUEST)
+_MODEL_RESPONSE = sys.intern(EventType.MODEL_RESPONSE)
+_MODEL_RESPONSE_CHUNK = sys.intern(EventType.MODEL_RESPONSE_CHUNK)
+_MODEL_REASONING = sys.intern(EventType.MODEL_REASONING)
+_TOOL_CALL = sys.intern(EventType.TOOL_CALL)
+_TOOL_RESULT = sys.intern(EventType.TOOL_RESULT)
+_TOOL_ERROR = sys.intern(EventType.TOOL_ERROR)
+_FLOW_STEP = sys.intern(EventType.FLOW_STEP)
+_FLOW_REASONING = sys.intern(EventType.FLOW_REASONING)
+_FLOW_COMPLETE = sys.intern(EventType.FLOW_COMPLETE)
+
 
 def add_agent_start_event(agent_name: str, **extra: Any) -> None:
     """Emit agent start event."""
-    add_event(EventType.AGENT_START, {"agent_name": agent_name, **extra})
+    add_event(_AGENT_START, {"agent_name": agent_name, **extra})
 
 
 def add_agent_complete_event(agent_name: str, response: Any = None, **extra: Any) -> None:
@@ -171,7 +267,7 @@ def add_agent_complete_event(agent_name: str, response: Any = None, **extra: Any
     attrs = {"agent_name": agent_name, **extra}
     if response is not None:
         attrs["response"] = response
-    add_event(EventType.AGENT_COMPLETE, attrs)
+    add_event(_AGENT_COMPLETE, attrs)
 
 
 def add_agent_step_event(
@@ -179,7 +275,7 @@ def add_agent_step_event(
 ) -> None:
     """Emit agent step event (iteration in agent loop)."""
     add_event(
-        EventType.AGENT_STEP,
+        _AGENT_STEP,
         {"agent_name": agent_name, "step_number": step_number, "step_type": step_type, **extra},
     )
 
@@ -188,22 +284,22 @@ def add_model_request_event(
     model: str | None = None, message_count: int | None = None, **extra: Any
 ) -> None:
     """Emit model request event."""
-    attrs = {**extra}
+    attrs = extra
     if model:
         attrs["model"] = model
     if message_count is not None:
         attrs["message_count"] = message_count
-    add_event(EventType.MODEL_REQUEST, attrs)
+    add_event(_MODEL_REQUEST, attrs)
 
 
 def add_model_response_event(response_type: str, **extra: Any) -> None:
     """Emit model response event."""
-    add_event(EventType.MODEL_RESPONSE, {"response_type": response_type, **extra})
+    add_event(_MODEL_RESPONSE, {"response_type": response_type, **extra})
 
 
 def add_model_response_chunk_event(chunk: str, index: int = 0, **extra: Any) -> None:
     """Emit model response chunk event (for streaming)."""
-    add_event(EventType.MODEL_RESPONSE_CHUNK, {"chunk": chunk, "index": index, **extra})
+    add_event(_MODEL_RESPONSE_CHUNK, {"chunk": chunk, "index": index, **extra})
 
 
 def add_model_reasoning_event(reasoning: str, step: int | None = None, **extra: Any) -> None:
@@ -211,7 +307,7 @@ def add_model_reasoning_event(reasoning: str, step: int | None = None, **extra:
     attrs = {"reasoning": reasoning, **extra}
     if step is not None:
         attrs["step"] = step
-    add_event(EventType.MODEL_REASONING, attrs)
+    add_event(_MODEL_REASONING, attrs)
 
 
 def add_tool_call_event(
@@ -227,7 +323,7 @@ def add_tool_call_event(
         attrs["arguments"] = arguments
     if step is not None:
         attrs["step"] = step
-    add_event(EventType.TOOL_CALL, attrs)
+    add_event(_TOOL_CALL, attrs)
 
 
 def add_tool_result_event(
@@ -243,7 +339,7 @@ def add_tool_result_event(
         attrs["result"] = result
     if step is not None:
         attrs["step"] = step
-    add_event(EventType.TOOL_RESULT, attrs)
+    add_event(_TOOL_RESULT, attrs)
 
 
 def add_tool_error_event(
@@ -257,12 +353,12 @@ def add_tool_error_event(
     attrs = {"tool_name": tool_name, "tool_id": tool_id, "error": error, **extra}
     if step is not None:
         attrs["step"] = step
-    add_event(EventType.TOOL_ERROR, attrs)
+    add_event(_TOOL_ERROR, attrs)
 
 
 def add_flow_step_event(step_number: int, **extra: Any) -> None:
     """Emit flow control step event."""
-    add_event(EventType.FLOW_STEP, {"step_number": step_number, **extra})
+    add_event(_FLOW_STEP, {"step_number": step_number, **extra})
 
 
 def add_flow_reasoning_event(reasoning: str, step: int | None = None, **extra: Any) -> None:
@@ -270,21 +366,42 @@ def add_flow_reasoning_event(reasoning: str, step: int | None = None, **extra: A
     attrs = {"reasoning": reasoning, **extra}
     if step is not None:
         attrs["step"] = step
-    add_event(EventType.FLOW_REASONING, attrs)
+    add_event(_FLOW_REASONING, attrs)
 
 
 def add_flow_complete_event(step: int | None = None, **extra: Any) -> None:
     """Emit flow control completion event."""
-    attrs = {**extra}
+    attrs = extra
     if step is not None:
         attrs["step"] = step
-    add_event(EventType.FLOW_COMPLETE, attrs)
+    add_event(_FLOW_COMPLETE, attrs)
 
 
 # =============================================================================
 # Streaming Context Manager
 # =============================================================================
 
+_OVERFLOW_POLICIES = ("drop_new", "drop_old")
+
+# Chunk events that EventStream(coalesce_chunks=True) merges, and the keys that
+# may differ between merged chunks
+_CHUNK_EVENTS = frozenset({EventType.MODEL_RESPONSE_CHUNK, EventType.MODEL_REASONING_CHUNK})
+_CHUNK_KEYS = frozenset({"chunk", "index"})
+
+
+def _same_chunk_stream(first: StreamEvent, event: StreamEvent) -> bool:
+    """Check whether two chunk events differ only in their chunk/index."""
+    if first.name != event.name or first.span_id != event.span_id:
+        return False
+    first_attrs = first.attributes
+    attrs = event.attributes
+    if first_attrs.keys() != attrs.keys():
+        return False
+    for key, value in attrs.items():
+        if key not in _CHUNK_KEYS and first_attrs[key] != value:
+            return False
+    return True
+
 
 class EventStream:
     """
@@ -292,6 +409,19 @@ class EventStream:
 
     Used by Module.astream() to yield events in real-time.
 
+    Args:
+        maxsize: Maximum number of buffered events (<= 0 means unbounded).
+        on_overflow: Policy when the buffer is full - "drop_new" discards the
+            incoming event, "drop_old" evicts the oldest buffered event.
+            Dropped events (including any emitted after close()) are
+            counted in dropped_count.
+        coalesce_chunks: Merge model response/reasoning chunk events that
+            arrive within window_ms of the first one (and differ only in
+            chunk/index) into a single event. The merged event keeps the
+            first chunk's attributes and timestamp, with "chunk" replaced by
+            a "chunks" list. Only applies inside a running event loop.
+        window_ms: Coalescing window in milliseconds.
+
     Example:
         async with EventStream() as stream:
             task = asyncio.create_task(agent.acall("Hello"))
@@ -300,27 +430,144 @@ class EventStream:
             await task
     """
 
-    def __init__(self) -> None:
-        self._queue: asyncio.Queue = asyncio.Queue()
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        on_overflow: str = "drop_new",
+        coalesce_chunks: bool = False,
+        window_ms: float = 1,
+    ) -> None:
+        if on_overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(
+                f"on_overflow must be one of {_OVERFLOW_POLICIES}, got {on_overflow!r}"
+            )
+        # Single-producer/single-consumer buffer: add_event appends, __aiter__
+        # pops. A None entry is the end-of-stream sentinel.
+        self._buf: deque[StreamEvent | None] = deque()
+        self._ready = asyncio.Event()
+        self._maxsize = maxsize
+        self._drop_old = on_overflow == "drop_old"
+        self._dropped = 0
+        self._closed = False
+        self._coalesce = coalesce_chunks
+        self._window = window_ms / 1000
+        # (first event, chunks, flush timer) of the chunk run being coalesced
+        self._pending: tuple[StreamEvent, list[str], asyncio.TimerHandle] | None = None
+        # (span_context, span_id hex, trace_id hex) of the last streamed span
+        self._span_ids: tuple[Any, str, str] = (None, "", "")
         self._token: contextvars.Token | None = None
-        self._callbacks: list[Callable[[StreamEvent], None]] = []
+        # Copy-on-write tuple: registration is rare, iteration is per event
+        self._callbacks: tuple[Callable[[StreamEvent], None], ...] = ()
+
+    @property
+    def dropped_count(self) -> int:
+        """Number of events discarded (buffer full, or emitted after close())."""
+        return self._dropped
 
     def on_event(self, callback: Callable[[StreamEvent], None]) -> None:
         """Register a callback for each event."""
-        self._callbacks.append(callback)
+        self._callbacks = (*self._callbacks, callback)
+
+    def put_nowait(self, event: StreamEvent) -> None:
+        """Append an event to the stream and wake the consumer."""
+        # Ignore events after close(): they would never be consumed, and with
+        # drop_old they could evict the end-of-stream sentinel
+        if self._closed:
+            self._dropped += 1
+            return
+        if self._coalesce and self._coalesce_event(event):
+            return
+        self._append(event)
+
+    def _append(self, event: StreamEvent) -> None:
+        """Append an event to the buffer, applying the overflow policy."""
+        buf = self._buf
+        if 0 < self._maxsize <= len(buf):
+            self._dropped += 1
+            if not self._drop_old:
+                return
+            buf.popleft()
+        buf.append(event)
+        self._ready.set()
+
+    def _coalesce_event(self, event: StreamEvent) -> bool:
+        """
+        Hold back or merge a chunk event.
+
+        Returns True if the event was absorbed into a pending chunk run.
+        Anything else first flushes the pending run so ordering is kept.
+        """
+        pending = self._pending
+        if event.name not in _CHUNK_EVENTS or "chunk" not in event.attributes:
+            if pending is not None:
+                self._flush_pending()
+            return False
+
+        if pending is not None:
+            if _same_chunk_stream(pending[0], event):
+                pending[1].append(event.attributes["chunk"])
+                return True
+            self._flush_pending()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to flush the window later: stream the chunk as-is
+            return False
+        timer = loop.call_later(self._window, self._flush_pending)
+        self._pending = (event, [event.attributes["chunk"]], timer)
+        return True
+
+    def _flush_pending(self) -> None:
+        """Emit the pending chunk run (if any) as a single event."""
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        first, chunks, timer = pending
+        timer.cancel()
+        if len(chunks) == 1:
+            self._append(first)
+            return
+        attrs = {key: value for key, value in first.attributes.items() if key != "chunk"}
+        attrs["chunks"] = chunks
+        self._append(
+            StreamEvent(
+                first.name,
+                attrs,
+                first.timestamp_ns,
+                first.span_name,
+                first.span_id,
+                first.trace_id,
+            )
+        )
+
+    def _put_sentinel(self) -> None:
+        """Append the end-of-stream sentinel once (never subject to maxsize)."""
+        # close() followed by __aexit__ must not enqueue a second sentinel
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_pending()
+        self._buf.append(None)
+        self._ready.set()
 
     async def __aenter__(self) -> EventStream:
-        self._token = _event_queue.set(self._queue)
+        # Re-entering reopens the stream so it can be closed again
+        self._closed = False
+        self._token = _event_queue.set(self)
         return self
 
     async def __aexit__(self, *exc) -> None:
         if self._token is not None:
             _event_queue.reset(self._token)
         # Signal end of stream
-        self._queue.put_nowait(None)
+        self._put_sentinel()
 
     def __enter__(self) -> EventStream:
-        self._token = _event_queue.set(self._queue)
+        # Re-entering reopens the stream so it can be closed again
+        self._closed = False
+        self._token = _event_queue.set(self)
         return self
 
     def __exit__(self, *exc) -> None:
@@ -329,28 +576,34 @@ class EventStream:
 
     def close(self) -> None:
         """Signal end of event stream."""
-        self._queue.put_nowait(None)
+        self._put_sentinel()
 
     async def __aiter__(self):
         """Async iteration over events."""
+        buf = self._buf
+        ready = self._ready
         while True:
-            event = await self._queue.get()
-            if event is None:
-                break
-            for callback in self._callbacks:
-                callback(event)
-            yield event
+            # Drain everything buffered, then sleep until the next put
+            while buf:
+                event = buf.popleft()
+                if event is None:
+                    return
+                callbacks = self._callbacks
+                if callbacks:
+                    for callback in callbacks:
+                        callback(event)
+                yield event
+            ready.clear()
+            await ready.wait()
 
     @property
     def events(self) -> list[StreamEvent]:
         """
-        Collect all events synchronously (drains queue).
+        Collect all events synchronously (drains buffer).
 
         Use only after stream is closed.
         """
-        collected = []
-        while not self._queue.empty():
-            event = self._queue.get_nowait()
-            if event is not None:
-                collected.append(event)
+        self._flush_pending()
+        collected = [event for event in self._buf if event is not None]
+        self._buf.clear()
         return collected
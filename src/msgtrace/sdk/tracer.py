@@ -9,7 +9,6 @@ import platform
 from threading import RLock
 
 from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
@@ -106,7 +105,12 @@ class TracerManager:
             # Console exporter for debugging
             exporter = ConsoleSpanExporter()
         else:
-            # OTLP HTTP exporter (default)
+            # OTLP HTTP exporter (default). Imported lazily: it pulls in
+            # protobuf/requests, which is wasted startup when tracing is off
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
             endpoint = os.getenv(
                 "MSGTRACE_OTLP_ENDPOINT", "http://localhost:8000/api/v1/traces/export"
             )
@@ -3,15 +3,24 @@ Tests for events module - span events and real-time streaming.
 """
 
 import asyncio
+import datetime
+import importlib.util
+import json
 import os
+import sys
+from unittest.mock import MagicMock
 
 import pytest
+from opentelemetry.sdk.trace import TracerProvider
 
 from msgtrace.sdk import Spans
+from msgtrace.sdk import events as events_module
 from msgtrace.sdk.events import (
     EventStream,
     EventType,
     StreamEvent,
+    _json_dumps,
+    _serialize_value,
     add_agent_complete_event,
     add_agent_start_event,
     add_agent_step_event,
@@ -39,6 +48,11 @@ def enable_telemetry():
     os.environ.pop("MSGTRACE_EXPORTER", None)
 
 
+async def _collect_names(stream):
+    """Collect the names of all events yielded by a stream."""
+    return [event.name async for event in stream]
+
+
 class TestEventType:
     """Test EventType constants."""
 
@@ -111,6 +125,11 @@ class TestStreamEvent:
         with pytest.raises(AttributeError):
             event.name = "modified"
 
+    def test_stream_event_uses_slots(self):
+        """Test that StreamEvent instances carry no per-instance __dict__."""
+        event = StreamEvent(name="test.event")
+        assert not hasattr(event, "__dict__")
+
 
 class TestAddEvent:
     """Test add_event function."""
@@ -139,6 +158,96 @@ class TestAddEvent:
                 },
             )
 
+    def test_add_event_noop_skips_serialization(self, monkeypatch):
+        """Test that attributes are not serialized without a recording span or stream."""
+
+        def fail(value):
+            raise AssertionError("attributes should not be serialized")
+
+        monkeypatch.setattr("msgtrace.sdk.events._serialize_value", fail)
+        add_event("test.event", {"dict": {"nested": "value"}})
+
+    def test_add_event_scalar_attributes_not_copied(self, monkeypatch):
+        """Test that scalar-only attributes are handed to the span without a copy."""
+        span = MagicMock()
+        span.is_recording.return_value = True
+        monkeypatch.setattr("msgtrace.sdk.events._get_current_span", lambda: span)
+
+        attrs = {"string": "value", "number": 42}
+        add_event("test.event", attrs)
+        assert span.add_event.call_args.args[1] is attrs
+
+        attrs = {"string": "value", "dict": {"nested": "value"}}
+        add_event("test.event", attrs)
+        serialized = span.add_event.call_args.args[1]
+        assert serialized is not attrs
+        assert json.loads(serialized["dict"]) == {"nested": "value"}
+        assert attrs["dict"] == {"nested": "value"}
+
+    def test_add_event_queries_span_once(self, monkeypatch):
+        """Test that recording state and span context are read once per event."""
+        span = MagicMock()
+        span.is_recording.return_value = True
+        span.get_span_context.return_value = MagicMock(span_id=1, trace_id=2)
+        monkeypatch.setattr("msgtrace.sdk.events._get_current_span", lambda: span)
+
+        with EventStream():
+            add_event("test.event", {"key": "value"})
+            add_tool_call_event("search", "call_123", arguments={"query": "weather"})
+
+        assert span.is_recording.call_count == 2
+        assert span.get_span_context.call_count == 2
+
+    def test_serialize_value_matches_json(self):
+        """Test that complex attribute values serialize to equivalent JSON."""
+        value = {"nested": {"key": "value"}, "list": [1, 2, 3], 1: "int key"}
+        assert json.loads(_serialize_value(value)) == json.loads(json.dumps(value))
+
+    def test_serialize_value_matches_stdlib_format(self):
+        """Test that the active backend agrees with the stdlib encoder."""
+        value = {
+            "when": datetime.datetime(2024, 1, 1, 12),
+            "text": "ção",
+            "nested": {"list": [1, 2.5, None, True]},
+            1: "int key",
+        }
+        assert _serialize_value(value) == _json_dumps(value)
+        assert _serialize_value(value) == (
+            '{"when":"2024-01-01 12:00:00","text":"ção",'
+            '"nested":{"list":[1,2.5,null,true]},"1":"int key"}'
+        )
+
+    def test_serialize_value_stdlib_fallback(self, monkeypatch):
+        """Test the stdlib encoder used when orjson is not installed."""
+        # Load a private copy of the module with orjson blocked from importing
+        monkeypatch.setitem(sys.modules, "orjson", None)
+        spec = importlib.util.spec_from_file_location(
+            "_events_without_orjson", events_module.__file__
+        )
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, spec.name, module)
+        spec.loader.exec_module(module)
+
+        assert module.orjson is None
+        assert module._serialize_value is module._json_dumps
+        value = {"when": datetime.datetime(2024, 1, 1, 12), "text": "ção", 1: [2**70]}
+        assert module._serialize_value(value) == (
+            '{"when":"2024-01-01 12:00:00","text":"ção","1":[1180591620717411303424]}'
+        )
+
+    def test_serialize_value_non_serializable(self):
+        """Test that non-JSON values fall back to their string form."""
+        assert json.loads(_serialize_value({"obj": object})) == {"obj": str(object)}
+
+    def test_serialize_value_big_int(self):
+        """Test that integers beyond 64 bits still serialize."""
+        assert json.loads(_serialize_value({"n": 2**70})) == {"n": 2**70}
+
+    def test_add_event_with_big_int_attribute(self):
+        """Test add_event with a >64-bit int nested in a dict attribute."""
+        with Spans.span_context("test_span"):
+            add_event("test.event", {"dict": {"n": 2**70}})
+
     def test_add_event_with_none_attributes(self):
         """Test add_event with None attributes."""
         with Spans.span_context("test_span"):
@@ -231,6 +340,54 @@ class TestConvenienceEventFunctions:
             add_flow_complete_event()
             add_flow_complete_event(step=3)
 
+    def test_convenience_functions_go_through_add_event(self, monkeypatch):
+        """Test that patching add_event intercepts the convenience functions."""
+        calls = []
+        monkeypatch.setattr(
+            "msgtrace.sdk.events.add_event", lambda name, attrs=None: calls.append(name)
+        )
+
+        add_tool_call_event("search", "call_123")
+        add_model_response_chunk_event("Hello")
+        add_flow_complete_event()
+
+        assert calls == [
+            EventType.TOOL_CALL,
+            EventType.MODEL_RESPONSE_CHUNK,
+            EventType.FLOW_COMPLETE,
+        ]
+
+    def test_convenience_functions_serialize_complex_values(self, monkeypatch):
+        """Test that dict/list parameters and extras are JSON-encoded for OTel."""
+        span = MagicMock()
+        span.is_recording.return_value = True
+        monkeypatch.setattr("msgtrace.sdk.events._get_current_span", lambda: span)
+
+        def otel_attrs():
+            return span.add_event.call_args.args[1]
+
+        add_tool_call_event("search", "call_123", arguments={"query": "weather"})
+        assert json.loads(otel_attrs()["arguments"]) == {"query": "weather"}
+
+        add_tool_result_event("search", "call_123", result=[1, 2])
+        assert json.loads(otel_attrs()["result"]) == [1, 2]
+
+        add_tool_result_event("search", "call_123", result="Sunny")
+        assert otel_attrs()["result"] == "Sunny"
+
+        add_agent_complete_event("my_agent", response={"key": "value"})
+        assert json.loads(otel_attrs()["response"]) == {"key": "value"}
+
+        add_tool_error_event("search", "c1", error={"code": 500})
+        assert json.loads(otel_attrs()["error"]) == {"code": 500}
+
+        add_model_reasoning_event(["step 1", "step 2"])
+        assert json.loads(otel_attrs()["reasoning"]) == ["step 1", "step 2"]
+
+        add_model_response_chunk_event("Hello", index=1, meta={"model": "gpt-4"})
+        assert json.loads(otel_attrs()["meta"]) == {"model": "gpt-4"}
+        assert otel_attrs()["chunk"] == "Hello"
+
 
 class TestEventStream:
     """Test EventStream context manager."""
@@ -239,14 +396,14 @@ class TestEventStream:
         """Test EventStream as sync context manager."""
         with EventStream() as stream:
             assert stream is not None
-            assert stream._queue is not None
+            assert stream._buf is not None
 
     @pytest.mark.asyncio
     async def test_event_stream_async_context(self):
         """Test EventStream as async context manager."""
         async with EventStream() as stream:
             assert stream is not None
-            assert stream._queue is not None
+            assert stream._buf is not None
 
     @pytest.mark.asyncio
     async def test_event_stream_captures_events(self):
@@ -306,6 +463,41 @@ class TestEventStream:
         # Note: span_name is empty because span_context uses start_span()
         # not start_as_current_span(). This is expected behavior.
 
+    def test_event_stream_span_ids_formatting(self):
+        """Test that streamed events carry hex span/trace IDs of the current span."""
+        tracer = TracerProvider().get_tracer(__name__)
+
+        with EventStream() as stream:
+            with tracer.start_as_current_span("current_span") as span:
+                add_event("test.event", {"key": "value"})
+            stream.close()
+
+        span_context = span.get_span_context()
+        (event,) = stream.events
+        assert event.span_name == "current_span"
+        assert event.span_id == format(span_context.span_id, "016x")
+        assert event.trace_id == format(span_context.trace_id, "032x")
+        assert len(event.span_id) == 16
+        assert len(event.trace_id) == 32
+
+    def test_event_stream_span_ids_follow_current_span(self):
+        """Test that span IDs are refreshed when the current span changes."""
+        tracer = TracerProvider().get_tracer(__name__)
+
+        with EventStream() as stream:
+            with tracer.start_as_current_span("first") as first:
+                add_event("event.1")
+                add_event("event.2")
+            with tracer.start_as_current_span("second") as second:
+                add_event("event.3")
+            add_event("event.4")
+
+        events = stream.events
+        first_id = format(first.get_span_context().span_id, "016x")
+        second_id = format(second.get_span_context().span_id, "016x")
+        assert [e.span_id for e in events] == [first_id, first_id, second_id, ""]
+        assert [e.span_name for e in events] == ["first", "first", "second", ""]
+
     @pytest.mark.asyncio
     async def test_event_stream_callback(self):
         """Test EventStream with callback."""
@@ -329,12 +521,91 @@ class TestEventStream:
         assert len(callback_events) == 1
         assert callback_events[0].name == "test.event"
 
+    @pytest.mark.asyncio
+    async def test_event_stream_multiple_callbacks(self):
+        """Test that every registered callback sees each event in order."""
+        calls = []
+
+        async with EventStream() as stream:
+            stream.on_event(lambda e: calls.append(("first", e.name)))
+            stream.on_event(lambda e: calls.append(("second", e.name)))
+            add_event("event.1")
+            add_event("event.2")
+            stream.close()
+            async for _ in stream:
+                pass
+
+        assert calls == [
+            ("first", "event.1"),
+            ("second", "event.1"),
+            ("first", "event.2"),
+            ("second", "event.2"),
+        ]
+
+    def test_event_stream_events_drains_buffer(self):
+        """Test that events returns buffered events once, without sentinels."""
+        with EventStream() as stream:
+            add_event("event.1")
+            add_event("event.2")
+            stream.close()
+
+        assert [e.name for e in stream.events] == ["event.1", "event.2"]
+        assert stream.events == []
+
     def test_event_stream_close(self):
         """Test EventStream close method."""
         with EventStream() as stream:
             stream.close()
-            # Queue should have None sentinel
-            assert stream._queue.get_nowait() is None
+            # Buffer should have None sentinel
+            assert stream._buf.popleft() is None
+
+    @pytest.mark.asyncio
+    async def test_event_stream_consumer_waits_for_producer(self):
+        """Test that a waiting consumer is woken by events emitted later."""
+        collected_events = []
+
+        async with EventStream() as stream:
+
+            async def consume():
+                async for event in stream:
+                    collected_events.append(event.name)
+
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0)  # Let the consumer block on the empty buffer
+            add_event("event.1")
+            await asyncio.sleep(0)
+            add_event("event.2")
+            add_event("event.3")
+            stream.close()
+            await consumer
+
+        assert collected_events == ["event.1", "event.2", "event.3"]
+
+    @pytest.mark.asyncio
+    async def test_event_stream_single_sentinel(self):
+        """Test that close() followed by __aexit__ enqueues one sentinel."""
+        async with EventStream() as stream:
+            add_event("event.1")
+            stream.close()
+            stream.close()
+
+        assert list(stream._buf).count(None) == 1
+
+    @pytest.mark.asyncio
+    async def test_event_stream_reentry(self):
+        """Test that a stream can be entered, consumed and closed twice."""
+        stream = EventStream()
+        for run in range(2):
+            async with stream:
+                add_event(f"event.{run}")
+                stream.close()
+                collected = await asyncio.wait_for(_collect_names(stream), timeout=1)
+            assert collected == [f"event.{run}"]
+
+        async with stream:
+            add_event("event.2")
+        collected = await asyncio.wait_for(_collect_names(stream), timeout=1)
+        assert collected == ["event.2"]
 
     @pytest.mark.asyncio
     async def test_event_stream_multiple_events_order(self):
@@ -362,6 +633,158 @@ class TestEventStream:
             assert event.attributes["index"] == i
 
 
+class TestEventStreamOverflow:
+    """Test EventStream buffer bounds and overflow policies."""
+
+    def test_default_is_bounded(self):
+        """Test that the default stream buffer is bounded."""
+        stream = EventStream()
+        assert stream._maxsize == 10000
+        assert stream.dropped_count == 0
+
+    def test_drop_new(self):
+        """Test that drop_new discards incoming events when full."""
+        with EventStream(maxsize=2) as stream:
+            for i in range(5):
+                add_event(f"event.{i}")
+            stream.close()
+
+        assert [e.name for e in stream.events] == ["event.0", "event.1"]
+        assert stream.dropped_count == 3
+
+    def test_drop_old(self):
+        """Test that drop_old evicts the oldest buffered events when full."""
+        with EventStream(maxsize=2, on_overflow="drop_old") as stream:
+            for i in range(5):
+                add_event(f"event.{i}")
+            stream.close()
+
+        assert [e.name for e in stream.events] == ["event.3", "event.4"]
+        assert stream.dropped_count == 3
+
+    def test_unbounded(self):
+        """Test that maxsize <= 0 disables the bound."""
+        with EventStream(maxsize=0) as stream:
+            for i in range(50):
+                add_event(f"event.{i}")
+
+        assert len(stream.events) == 50
+        assert stream.dropped_count == 0
+
+    @pytest.mark.asyncio
+    async def test_close_when_full(self):
+        """Test that the end-of-stream sentinel is delivered on a full buffer."""
+        async with EventStream(maxsize=1) as stream:
+            add_event("event.0")
+            add_event("event.1")
+            stream.close()
+            collected = [event.name async for event in stream]
+
+        assert collected == ["event.0"]
+        assert stream.dropped_count == 1
+
+    @pytest.mark.asyncio
+    async def test_drop_old_keeps_sentinel(self):
+        """Test that events emitted after close() cannot evict the sentinel."""
+        async with EventStream(maxsize=1, on_overflow="drop_old") as stream:
+            add_event("event.0")
+            stream.close()
+            add_event("event.1")
+            add_event("event.2")
+            collected = await asyncio.wait_for(_collect_names(stream), timeout=1)
+
+        assert collected == ["event.0"]
+        assert stream.dropped_count == 2
+
+    def test_invalid_policy(self):
+        """Test that an unknown overflow policy is rejected."""
+        with pytest.raises(ValueError, match="on_overflow"):
+            EventStream(on_overflow="block")
+
+
+class TestEventStreamCoalescing:
+    """Test EventStream chunk coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_chunks_coalesced(self):
+        """Test that chunks emitted within the window become one event."""
+        async with EventStream(coalesce_chunks=True) as stream:
+            for i, chunk in enumerate(["The ", "weather ", "is ", "sunny."]):
+                add_model_response_chunk_event(chunk, index=i)
+            stream.close()
+            events = [event async for event in stream]
+
+        assert len(events) == 1
+        assert events[0].name == EventType.MODEL_RESPONSE_CHUNK
+        assert events[0].attributes == {
+            "index": 0,
+            "chunks": ["The ", "weather ", "is ", "sunny."],
+        }
+
+    @pytest.mark.asyncio
+    async def test_window_flush_wakes_consumer(self):
+        """Test that the pending run is flushed when the window expires."""
+        async with EventStream(coalesce_chunks=True, window_ms=1) as stream:
+            add_model_response_chunk_event("Hello", index=0)
+            add_model_response_chunk_event(" world", index=1)
+            event = await asyncio.wait_for(anext(aiter(stream)), timeout=1)
+
+        assert event.attributes["chunks"] == ["Hello", " world"]
+
+    @pytest.mark.asyncio
+    async def test_other_events_flush_and_keep_order(self):
+        """Test that non-chunk events flush pending chunks first."""
+        async with EventStream(coalesce_chunks=True) as stream:
+            add_model_response_chunk_event("a", index=0)
+            add_model_response_chunk_event("b", index=1)
+            add_model_response_event("text_generation")
+            add_model_response_chunk_event("c", index=2)
+            stream.close()
+            events = [event async for event in stream]
+
+        assert [e.name for e in events] == [
+            EventType.MODEL_RESPONSE_CHUNK,
+            EventType.MODEL_RESPONSE,
+            EventType.MODEL_RESPONSE_CHUNK,
+        ]
+        assert events[0].attributes["chunks"] == ["a", "b"]
+        # A run of one chunk is streamed unchanged
+        assert events[2].attributes == {"chunk": "c", "index": 2}
+
+    @pytest.mark.asyncio
+    async def test_chunks_with_different_attributes_not_merged(self):
+        """Test that chunks are only merged when their other keys match."""
+        async with EventStream(coalesce_chunks=True) as stream:
+            add_model_response_chunk_event("a", index=0, choice=0)
+            add_model_response_chunk_event("b", index=0, choice=1)
+            stream.close()
+            events = [event async for event in stream]
+
+        assert [e.attributes for e in events] == [
+            {"chunk": "a", "index": 0, "choice": 0},
+            {"chunk": "b", "index": 0, "choice": 1},
+        ]
+
+    def test_no_coalescing_without_running_loop(self):
+        """Test that chunks pass through unchanged outside an event loop."""
+        with EventStream(coalesce_chunks=True) as stream:
+            add_model_response_chunk_event("a", index=0)
+            add_model_response_chunk_event("b", index=1)
+
+        assert [e.attributes["chunk"] for e in stream.events] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        """Test that chunk events are not coalesced unless requested."""
+        async with EventStream() as stream:
+            add_model_response_chunk_event("a", index=0)
+            add_model_response_chunk_event("b", index=1)
+            stream.close()
+            events = [event async for event in stream]
+
+        assert [e.attributes["chunk"] for e in events] == ["a", "b"]
+
+
 class TestEventStreamIntegration:
     """Integration tests for event streaming with spans."""
 